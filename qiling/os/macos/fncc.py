@@ -7,14 +7,17 @@ from typing import Any, Mapping
 
 from qiling import Qiling
 from qiling.const import QL_INTERCEPT
+from qiling.os.os import api_display_name
 
 def macos_kernel_api(params: Mapping[str, Any] = {}, passthru: bool = False):
     def decorator(func):
+        display_name = api_display_name(func.__name__)
+
         def wrapper(ql: Qiling, pc: int, api_name: str):
             onenter = ql.os.user_defined_api[QL_INTERCEPT.ENTER].get(api_name)
             onexit = ql.os.user_defined_api[QL_INTERCEPT.EXIT].get(api_name)
 
-            return ql.os.call(pc, func, params, onenter, onexit, passthru=passthru)
+            return ql.os.call(pc, func, params, onenter, onexit, passthru=passthru, fname=display_name)
 
         return wrapper
 
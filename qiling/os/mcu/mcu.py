@@ -42,16 +42,25 @@ class QlOsMcu(QlOs):
         self.runable = True
         self.fast_mode = False
 
+        # number of instructions to emulate in a row before peripherals are updated.
+        # higher values spare emulation restarts, at the cost of peripherals accuracy
+        self.step_interval = 1
+
     def stop(self):
         self.ql.emu_stop()
         self.runable = False
 
     def run(self):
-        def current_pc() -> int:
-            if hasattr(self.ql.arch, 'effective_pc'):
-                return self.ql.arch.effective_pc
+        arch = self.ql.arch
+
+        # determine how pc should be read once, rather than on every step
+        if hasattr(arch, 'effective_pc'):
+            def current_pc() -> int:
+                return arch.effective_pc
 
-            return self.ql.arch.regs.arch_pc
+        else:
+            def current_pc() -> int:
+                return arch.regs.arch_pc
 
         count = self.ql.count or 0
         end = self.ql.exit_point or -1
@@ -69,18 +78,50 @@ class QlOsMcu(QlOs):
             if timeout != 0:
                 self.ql.log.warning("Timeout is not supported in non-fast mode.")
 
+            # bind hot methods to locals to spare the attribute lookups on every step
+            emu_start = self.ql.emu_start
+            hw_step = self.ql.hw.step
+
+            interval = max(self.step_interval, 1)
+            batching = interval > 1
+
+            # when running more than one instruction at a time, let unicorn stop at the
+            # exit point by itself. note that the exit point may have its thumb bit set
+            until = end & ~0b1 if batching and end != -1 else 0
+
             self.runable = True
             self.counter = 0
-            while self.runable:
-                current_address = current_pc()
+            counter = 0
+
+            try:
+                while self.runable:
+                    current_address = current_pc()
+
+                    if current_address == end or (until and (current_address & ~0b1) == until):
+                        break
+
+                    # do not exceed the requested instructions count
+                    steps = min(interval, count - counter) if count else interval
+
+                    if steps <= 0:
+                        break
+
+                    emu_start(current_address, until, count=steps)
 
-                if current_address == end:
-                    break
+                    # unicorn does not tell how many instructions it emulated, so a batch that ended
+                    # at the exit point or by a stop request is not accounted for and peripherals are
+                    # not stepped for it; emulation ends there anyway
+                    if batching and (not self.runable or (until and (current_pc() & ~0b1) == until)):
+                        break
 
-                self.ql.emu_start(current_address, 0, count=1)
-                self.ql.hw.step()
+                    # instructions emulated by interrupt handlers that peripherals trigger here run
+                    # in nested emulation sessions and are not included in the count
+                    for _ in range(steps):
+                        hw_step()
 
-                self.counter += 1
+                    counter += steps
 
-                if count == self.counter:
-                    break
+                    if count and counter >= count:
+                        break
+            finally:
+                self.counter = counter
@@ -21,6 +21,14 @@ from .utils import QlOsUtils
 from .path import QlOsPath
 
 
+def api_display_name(fname: str) -> str:
+    """Get the name by which a hooked api function should be displayed. Hook functions
+    are named after the api they implement, prefixed with 'hook_'.
+    """
+
+    return fname[5:] if fname.startswith('hook_') else fname
+
+
 class QlOs:
     type: QL_OS
 
@@ -189,7 +197,7 @@ class QlOs:
 
         return tuple((aname, ahandlers[type(avalue)](avalue)) for atype, aname, avalue in targs)
 
-    def call(self, pc: int, func: Callable, proto: Mapping[str, Any], onenter: Optional[Callable], onexit: Optional[Callable], passthru: bool = False):
+    def call(self, pc: int, func: Callable, proto: Mapping[str, Any], onenter: Optional[Callable], onexit: Optional[Callable], passthru: bool = False, fname: Optional[str] = None):
         # resolve arguments values according to their types
         args = self.resolve_fcall_params(proto)
 
@@ -199,11 +207,16 @@ class QlOs:
         # post-process arguments values
         pargs = self.process_fcall_params(targs)
 
+        # api decorators determine the display name once, ahead of time. fall back to the
+        # function name for callers that did not provide one
+        if fname is None:
+            fname = api_display_name(func.__name__)
+
         # print
-        self.utils.print_function(pc, func.__name__, pargs, retval, passthru)
+        self.utils.print_function(pc, fname, pargs, retval, passthru)
 
         # append syscall to list
-        self.stats.log_api_call(pc, func.__name__, args, retval, retaddr)
+        self.stats.log_api_call(pc, fname, args, retval, retaddr)
 
         if not passthru:
             # WORKAROUND: we avoid modifying the pc register in case the emulation has stopped.
@@ -4,15 +4,44 @@
 #
 
 import json
-from typing import Any, List, MutableMapping, Mapping, Optional, Set
+from collections import defaultdict
+from typing import Any, Dict, List, MutableMapping, Mapping, Optional, Set
+
+
+class ApiCallRecord:
+    """A recorded API call. This is kept as a lightweight fixed-layout record,
+    since one is created for every emulated API call.
+    """
+
+    __slots__ = ('params', 'retval', 'address', 'retaddr', 'position')
+
+    def __init__(self, params: Mapping, retval: Any, address: int, retaddr: int, position: int):
+        self.params = params
+        self.retval = retval
+        self.address = address
+        self.retaddr = retaddr
+        self.position = position
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Get the record fields as a dictionary.
+        """
+
+        return {
+            'params'   : self.params,
+            'retval'   : self.retval,
+            'address'  : self.address,
+            'retaddr'  : self.retaddr,
+            'position' : self.position
+        }
+
 
 class QlOsStats:
     """Record basic OS statistics, such as API calls and strings.
     """
 
     def __init__(self):
-        self.syscalls: MutableMapping[str, List] = {}
-        self.strings: MutableMapping[str, Set] = {}
+        self.syscalls: MutableMapping[str, List[ApiCallRecord]] = {}
+        self.strings: MutableMapping[str, Set] = defaultdict(set)
 
         self.position = 0
 
@@ -38,7 +67,7 @@ class QlOsStats:
 
         for key, values in self.syscalls.items():
             ret.append(f'{key}:')
-            ret.extend(f'  {json.dumps(value):s}' for value in values)
+            ret.extend(f'  {json.dumps(value.as_dict()):s}' for value in values)
 
         ret.extend(QlOsStats._banner('strings ocurrences'))
 
@@ -58,16 +87,7 @@ class QlOsStats:
             retaddr : address to which the api function returned
         """
 
-        if name.startswith('hook_'):
-            name = name[5:]
-
-        self.syscalls.setdefault(name, []).append({
-            'params'   : params,
-            'retval'   : retval,
-            'address'  : address,
-            'retaddr'  : retaddr,
-            'position' : self.position
-        })
+        self.syscalls.setdefault(name, []).append(ApiCallRecord(params, retval, address, retaddr, self.position))
 
         self.position += 1
 
@@ -78,8 +98,11 @@ class QlOsStats:
             s : string to record
         """
 
+        strings = self.strings
+        position = self.position
+
         for token in s.split(' '):
-            self.strings.setdefault(token, set()).add(self.position)
+            strings[token].add(position)
 
 
 class QlWinStats(QlOsStats):
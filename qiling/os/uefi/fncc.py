@@ -7,9 +7,12 @@ from typing import Any, Mapping
 
 from qiling import Qiling
 from qiling.const import QL_INTERCEPT
+from qiling.os.os import api_display_name
 
 def dxeapi(params: Mapping[str, Any] = {}):
     def decorator(func):
+        display_name = api_display_name(func.__name__)
+
         def wrapper(ql: Qiling):
             pc = ql.arch.regs.arch_pc
             fname = func.__name__
@@ -18,7 +21,7 @@ def dxeapi(params: Mapping[str, Any] = {}):
             onenter = ql.os.user_defined_api[QL_INTERCEPT.ENTER].get(fname)
             onexit = ql.os.user_defined_api[QL_INTERCEPT.EXIT].get(fname)
 
-            return ql.os.call(pc, f, params, onenter, onexit)
+            return ql.os.call(pc, f, params, onenter, onexit, fname=display_name)
 
         return wrapper
 
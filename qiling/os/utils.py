@@ -7,18 +7,122 @@
 This module is intended for general purpose functions that are only used in qiling.os
 """
 
-from typing import Callable, Iterable, Iterator, List, MutableMapping, Sequence, Tuple, TypeVar, Union
+import functools
+import logging
+import re
+import struct
+
+from typing import Callable, Iterable, Iterator, List, MutableMapping, Optional, Sequence, Tuple, TypeVar, Union
 from uuid import UUID
 
 from qiling import Qiling
-from qiling.const import QL_VERBOSE
+from qiling.const import QL_ENDIAN, QL_VERBOSE
 
 # TODO: separate windows-specific implementation
 from qiling.os.windows.structs import make_unicode_string
 
 
+# https://docs.microsoft.com/en-us/cpp/c-runtime-library/format-specification-syntax-printf-and-wprintf-functions
+# %[flags][width][.precision][size]type
+_PRINTF_FMT = re.compile(r'''%
+    (?P<follows>%|
+        (?P<flags>[-+0 #]+)?
+        (?P<width>[*]|[0-9]+)?
+        (?:\.(?P<precision>[*]|[0-9]+))?
+        (?P<size>hh|ll|I32|I64|[hjltwzIL])?
+        (?P<type>[diopuaAcCeEfFgGsSxXZ])
+    )
+''', re.VERBOSE)
+
+
+@functools.lru_cache(maxsize=4096)
+def _compile_printf_fmt(format: str) -> Sequence[Tuple[str, Optional[Tuple[str, str, int]]]]:
+    """Break a printf format string down into literal text and conversion specs, and
+    convert the specs into their Python equivalents. Results are cached, since the
+    same format strings tend to be used over and over.
+
+    Returns: a sequence of literal text preceding a conversion spec, paired with the
+    spec info: original type, Python format spec and number of width and precision
+    values to be taken from the arguments list. The last literal text is paired with
+    None
+    """
+
+    compiled = []
+    literal = ''
+    pos = 0
+
+    for m in _PRINTF_FMT.finditer(format):
+        literal += format[pos:m.start()]
+        pos = m.end()
+
+        if m['follows'] == '%':
+            literal += '%'
+            continue
+
+        # python and printf flags are identical
+        flags = m['flags'] or ''
+        width = m['width'] or ''
+        prec = m['precision'] or ''
+
+        if prec:
+            prec = f'.{prec}'
+
+        typ = m['type']
+
+        pytyp = {
+            'S': 's',
+            'Z': 's',
+            'C': 'c',
+            'p': 'x'
+        }.get(typ, typ)
+
+        if typ == 'p' and '#' not in flags:
+            flags += '#'
+
+        nstars = (width == '*') + (prec == '.*')
+
+        compiled.append((literal, (typ, f'%{flags}{width}{prec}{pytyp}', nstars)))
+        literal = ''
+
+    compiled.append((literal + format[pos:], None))
+
+    return tuple(compiled)
+
+
+# translation table for escaping strings: covers the common special chars, along with C0
+# and C1 control chars which are escaped the same way repr does
+_STR_ESCAPE = {
+    **{c: f'\\x{c:02x}' for c in (*range(0x20), *range(0x7f, 0xa0))},
+    ord('\t'): '\\t',
+    ord('\n'): '\\n',
+    ord('\r'): '\\r',
+    ord('\\'): '\\\\',
+    ord('"'): '\\"'
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _ptr_array_struct(endian: QL_ENDIAN, pointersize: int, count: int) -> struct.Struct:
+    """Get a precompiled struct for unpacking an array of native pointers.
+    """
+
+    modifier = {
+        QL_ENDIAN.EL: '<',
+        QL_ENDIAN.EB: '>'
+    }[endian]
+
+    typ = {
+        2: 'H',
+        4: 'I',
+        8: 'Q'
+    }[pointersize]
+
+    return struct.Struct(f'{modifier}{count}{typ}')
+
+
 class QlOsUtils:
     ELLIPSIS_PREF = r'__qlva_'
+    READ_BLOCK_SIZE = 256
 
     def __init__(self, ql: Qiling):
         self.ql = ql
@@ -36,24 +140,40 @@ class QlOsUtils:
         """
 
         terminator = '\x00'.encode(encoding)
+        charlen = len(terminator)
+
+        # limit number of bytes to read, if required
+        maxsize = maxlen * charlen if maxlen else None
 
         data = bytearray()
-        charlen = len(terminator)
-        strlen = 0
+        offset = 0
 
         while True:
-            char = self.ql.mem.read(address, charlen)
+            # read memory in blocks rather than char by char, to spare the overhead of many small
+            # reads. blocks never cross an alignment boundary, so they never span onto another page
+            size = QlOsUtils.READ_BLOCK_SIZE - (address % QlOsUtils.READ_BLOCK_SIZE)
 
-            if char == terminator:
-                break
+            if maxsize is not None:
+                size = min(size, maxsize - len(data))
+
+            data += self.ql.mem.read(address, size)
+            address += size
+
+            # look for the terminator, but only in char-aligned positions
+            idx = data.find(terminator, offset)
 
-            data += char
-            strlen += 1
+            while idx != -1 and idx % charlen:
+                idx = data.find(terminator, idx + 1)
+
+            if idx != -1:
+                del data[idx:]
+                break
 
-            if strlen == maxlen:
+            if maxsize is not None and len(data) >= maxsize:
                 break
 
-            address += charlen
+            # resume the search where the trailing partial char begins
+            offset = len(data) - (len(data) % charlen)
 
         s = data.decode(encoding, errors='backslashreplace')
         self.ql.os.stats.log_string(s)
@@ -79,10 +199,16 @@ class QlOsUtils:
 
     @staticmethod
     def stringify(s: str) -> str:
-        """Decorate a string with quotation marks.
+        """Decorate a string with quotation marks, escaping special characters.
         """
 
-        return f'"{repr(s)[1:-1]}"'
+        escaped = s.translate(_STR_ESCAPE)
+
+        # other non-printable chars are rare; escape them one by one, the way repr does
+        if not escaped.isprintable():
+            escaped = ''.join(c if c.isprintable() else repr(c)[1:-1] for c in escaped)
+
+        return f'"{escaped}"'
 
     def print_function(self, address: int, fname: str, pargs: Sequence[Tuple[str, str]], ret: Union[int, str, None], passthru: bool):
         '''Print out function invocation detais.
@@ -95,8 +221,9 @@ class QlOsUtils:
             passthru: whether this is a passthrough invocation (no frame unwinding)
         '''
 
-        if fname.startswith('hook_'):
-            fname = fname[5:]
+        # nothing is going to be emitted; spare the formatting work
+        if not self.ql.log.isEnabledFor(logging.INFO):
+            return
 
         def __assign_arg(name: str, value: str) -> str:
             # ignore arg names generated by variadric functions
@@ -114,29 +241,18 @@ class QlOsUtils:
         # optional prefixes and suffixes
         fret = f' = {ret}' if ret is not None else ''
         fpass = f' (PASSTHRU)' if passthru else ''
-        faddr = f'{address:#0{self.ql.arch.bits // 4 + 2}x}: ' if self.ql.verbose >= QL_VERBOSE.DEBUG else ''
 
-        log = f'{faddr}{fname}({fargs}){fret}{fpass}'
+        log = f'{fname}({fargs}){fret}{fpass}'
 
         if self.ql.verbose >= QL_VERBOSE.DEBUG:
-            self.ql.log.debug(log)
+            self.ql.log.debug(f'{address:#0{self.ql.arch.bits // 4 + 2}x}: {log}')
         else:
             self.ql.log.info(log)
 
     def __common_printf(self, format: str, va_args: Iterator[int], wstring: bool) -> Tuple[str, Sequence[int]]:
-        import re
-
-        # https://docs.microsoft.com/en-us/cpp/c-runtime-library/format-specification-syntax-printf-and-wprintf-functions
-        # %[flags][width][.precision][size]type
-        fmtstr = re.compile(r'''%
-            (?P<follows>%|
-                (?P<flags>[-+0 #]+)?
-                (?P<width>[*]|[0-9]+)?
-                (?:.(?P<precision>[*]|[0-9]+))?
-                (?P<size>hh|ll|I32|I64|[hjltwzIL])?
-                (?P<type>[diopuaAcCeEfFgGsSxXZ])
-            )
-        ''', re.VERBOSE)
+        # plain strings have nothing to convert and consume no arguments
+        if '%' not in format:
+            return format, []
 
         T = TypeVar('T')
 
@@ -148,74 +264,56 @@ class QlOsUtils:
                 out.append(elem)
                 yield elem
 
-        repl_args = []  # processed arguments
         orig_args = []  # original arguments
 
         va_list = __dup(va_args, orig_args)
 
         read_string = self.read_wstring if wstring else self.read_cstring
 
-        def __repl(m: re.Match) -> str:
-            """Convert printf format string tokens into Python's.
-            """
-
-            if m['follows'] == '%':
-                return '%%'
-
-            else:
-                flags = m['flags'] or ''
-
-                fill  = ' ' if ' ' in flags else ''
-                align = '<' if '-' in flags else ''
-                sign  = '+' if '+' in flags else ''
-                pound = '#' if '#' in flags else ''
-                zeros = '0' if '0' in flags else ''
+        out = []
 
-                width = m['width'] or ''
+        for literal, spec in _compile_printf_fmt(format):
+            out.append(literal)
 
-                if width == '*':
-                    width = f'{next(va_list)}'
+            if spec is None:
+                continue
 
-                prec = m['precision'] or ''
+            typ, pyfmt, nstars = spec
 
-                if prec == '*':
-                    prec = f'{next(va_list)}'
+            # width and precision may be passed as arguments as well
+            args = [next(va_list) for _ in range(nstars)]
+            arg = next(va_list)
 
-                if prec:
-                    prec = f'.{prec}'
+            if typ in 'sS':
+                arg = read_string(arg)
 
-                typ = m['type']
-                arg = next(va_list)
+            elif typ == 'Z':
+                # note: ANSI_STRING and UNICODE_STRING have identical layout
+                ucstr_struct = make_unicode_string(self.ql.arch.bits)
 
-                if typ in 'sS':
-                    typ = 's'
-                    arg = read_string(arg)
+                with ucstr_struct.ref(self.ql.mem, arg) as ucstr_obj:
+                    arg = read_string(ucstr_obj.Buffer)
 
-                elif typ == 'Z':
-                    # note: ANSI_STRING and UNICODE_STRING have identical layout
-                    ucstr_struct = make_unicode_string(self.ql.arch.bits)
+            args.append(arg)
 
-                    with ucstr_struct.ref(self.ql.mem, arg) as ucstr_obj:
-                        typ = 's'
-                        arg = read_string(ucstr_obj.Buffer)
+            out.append(pyfmt % tuple(args))
 
-                elif typ == 'p':
-                    pound = '#'
-                    typ = 'x'
+        return ''.join(out), orig_args
 
-                repl_args.append(arg)
-
-                return f'%{fill}{align}{sign}{pound}{zeros}{width}{prec}{typ}'
+    def va_list(self, ptr: int) -> Iterator[int]:
+        endian = self.ql.arch.endian
+        pointersize = self.ql.arch.pointersize
 
-        out = fmtstr.sub(__repl, format)
+        while True:
+            # read as many args as possible at once, without crossing an alignment boundary
+            size = QlOsUtils.READ_BLOCK_SIZE - (ptr % QlOsUtils.READ_BLOCK_SIZE)
+            count = max(size // pointersize, 1)
 
-        return out % tuple(repl_args), orig_args
+            data = self.ql.mem.read(ptr, count * pointersize)
 
-    def va_list(self, ptr: int) -> Iterator[int]:
-        while True:
-            yield self.ql.mem.read_ptr(ptr)
+            yield from _ptr_array_struct(endian, pointersize, count).unpack(data)
 
-            ptr += self.ql.arch.pointersize
+            ptr += count * pointersize
 
     def sprintf(self, buff: int, format: str, va_args: Iterator[int], wstring: bool = False) -> Tuple[int, Callable]:
         out, args = self.__common_printf(format, va_args, wstring)
@@ -8,6 +8,7 @@ from typing import Any, Mapping
 
 from qiling import Qiling
 from qiling.const import QL_INTERCEPT
+from qiling.os.os import api_display_name
 
 # calling conventions
 STDCALL = 1
@@ -16,6 +17,8 @@ MS64    = 3
 
 def winsdkapi(cc: int, params: Mapping[str, Any] = {}, passthru: bool = False):
     def decorator(func):
+        display_name = api_display_name(func.__name__)
+
         @wraps(func)
         def wrapper(ql: Qiling, pc: int, api_name: str):
             ql.os.fcall = ql.os.fcall_select(cc)
@@ -23,7 +26,7 @@ def winsdkapi(cc: int, params: Mapping[str, Any] = {}, passthru: bool = False):
             onenter = ql.os.user_defined_api[QL_INTERCEPT.ENTER].get(api_name)
             onexit = ql.os.user_defined_api[QL_INTERCEPT.EXIT].get(api_name)
 
-            return ql.os.call(pc, func, params, onenter, onexit, passthru=passthru)
+            return ql.os.call(pc, func, params, onenter, onexit, passthru=passthru, fname=display_name)
 
         return wrapper
 
@@ -257,6 +257,7 @@ def make_list_entry(archbits: int):
     return LIST_ENTRY
 
 
+@lru_cache(maxsize=2)
 def make_device_object(archbits: int):
     native_type = struct.get_native_type(archbits)
     Struct = struct.get_aligned_struct(archbits)
@@ -359,6 +360,7 @@ def make_device_object(archbits: int):
     return DEVICE_OBJECT
 
 
+@lru_cache(maxsize=2)
 def make_io_stack_location(archbits: int):
     native_type = struct.get_native_type(archbits)
     Struct = struct.get_aligned_struct(archbits)
@@ -413,6 +415,7 @@ def make_io_stack_location(archbits: int):
     return IO_STACK_LOCATION
 
 
+@lru_cache(maxsize=2)
 def make_irp(archbits: int):
     native_type = struct.get_native_type(archbits)
     Struct = struct.get_aligned_struct(archbits)
@@ -476,6 +479,7 @@ def make_irp(archbits: int):
 #   ULONG            ByteOffset;
 # } MDL, *PMDL;
 
+@lru_cache(maxsize=2)
 def make_mdl(archbits: int):
     native_type = struct.get_native_type(archbits)
     Struct = struct.get_aligned_struct(archbits)
@@ -3,7 +3,8 @@
 # Cross Platform and Multi Architecture Advanced Binary Emulation Framework
 #
 
-from typing import Iterable, Optional, Tuple, TypeVar
+from functools import lru_cache
+from typing import Any, Optional, Sequence, Tuple, TypeVar
 
 from unicorn import UcError
 
@@ -29,76 +30,167 @@ def has_lib_ext(name: str) -> bool:
     return ext in ("dll", "exe", "sys", "drv")
 
 
-def io_Write(ql: Qiling, in_buffer: bytes) -> int:
-    major_func = ql.loader.driver_object.MajorFunction[IRP_MJ_WRITE]
+def _heap_alloc_many(ql: Qiling, sizes: Sequence[int]) -> Tuple[int, int, Sequence[int]]:
+    """Allocate a single heap chunk to accommodate several memory regions at once.
+    Regions are laid out consecutively, at offsets that are aligned to the native
+    pointer size. Note that the chunk base itself is not aligned beyond what the
+    heap allocator provides.
 
-    if not major_func:
-        raise QlErrorSyscallError('null MajorFunction field')
+    Args:
+        sizes: sequence of regions sizes in bytes
 
-    # keep track of all heap allocation within this scope to be able
-    # to free them when done
-    allocations = []
+    Returns: a 3-tuple of the chunk base address, the chunk size and the regions addresses
+    """
 
-    def __heap_alloc(size: int) -> int:
-        address = ql.os.heap.alloc(size)
-        allocations.append(address)
+    alignment = ql.arch.pointersize
+    offsets = []
+    total = 0
 
-        return address
+    for size in sizes:
+        offsets.append(total)
+        total += ql.mem.align_up(size, alignment)
 
-    def __free_all(allocations: Iterable[int]) -> None:
-        for address in allocations:
-            ql.os.heap.free(address)
+    base = ql.os.heap.alloc(total)
 
-    # allocate memory for IRP
-    irp_struct = make_irp(ql.arch.bits)
-    irp_addr = __heap_alloc(irp_struct.sizeof())
-    ql.log.info(f'IRP is at {irp_addr:#x}')
+    if not base:
+        raise QlErrorSyscallError('could not allocate heap memory')
+
+    return base, total, tuple(base + offset for offset in offsets)
+
+
+def _write_scratch(ql: Qiling, base: int, size: int, placements: Sequence[Tuple[int, Any]]) -> None:
+    """Lay out several buffers and structures on a scratch buffer and write it to
+    memory all at once.
+
+    Args:
+        base: memory address to write the scratch buffer to
+        size: scratch buffer size in bytes
+        placements: sequence of 2-tuples of a memory address and the data to place
+        there (either a buffer or a structure)
+    """
+
+    scratch = bytearray(size)
+
+    for address, data in placements:
+        # use a flat view of the data (either a buffer or a structure) to avoid copying it
+        view = memoryview(data).cast('B')
+        offset = address - base
+
+        scratch[offset:offset + view.nbytes] = view
 
-    # populate the structure
-    with irp_struct.ref(ql.mem, irp_addr) as irp_obj:
+    ql.mem.write(base, bytes(scratch))
 
-        # allocate memory for IO_STACK_LOCATION
-        irpstack_struct = make_io_stack_location(ql.arch.bits)
-        irpstack_addr = __heap_alloc(irpstack_struct.sizeof())
-        ql.log.info(f'IO_STACK_LOCATION is at {irpstack_addr:#x}')
 
-        # populate the structure
-        with irpstack_struct.ref(ql.mem, irpstack_addr) as irpstack_obj:
-            irpstack_obj.MajorFunction = IRP_MJ_WRITE
-            irpstack_obj.Parameters.Write.Length = len(in_buffer)
+def _build_mdl(ql: Qiling, buffer_addr: int, buffer_size: int):
+    """Create an MDL structure that describes a buffer.
 
-        # load DeviceObject from memory
-        drvobj_struct = ql.loader.driver_object.__class__
-        devobj_obj = drvobj_struct.load_from(ql.loader.driver_object.DeviceObject)
+    Args:
+        buffer_addr: described buffer address
+        buffer_size: described buffer size in bytes
 
-        # BUFFERED_IO
-        if devobj_obj.Flags & DO_BUFFERED_IO:
-            system_buffer_addr = __heap_alloc(len(in_buffer))
+    Returns: an MDL structure instance
+    """
+
+    mdl_obj = make_mdl(ql.arch.bits)()
+
+    mdl_obj.MappedSystemVa = buffer_addr
+    mdl_obj.StartVa = buffer_addr
+    mdl_obj.ByteOffset = 0
+    mdl_obj.ByteCount = buffer_size
+
+    return mdl_obj
 
-            ql.mem.write(system_buffer_addr, bytes(in_buffer))
-            irp_obj.AssociatedIrp.SystemBuffer = system_buffer_addr
 
-        # DIRECT_IO
-        elif devobj_obj.Flags & DO_DIRECT_IO:
-            mdl_struct = make_mdl(ql.arch.bits)
-            mdl_addr = __heap_alloc(mdl_struct.sizeof())
+@lru_cache(maxsize=2)
+def _io_status_layout(archbits: int) -> Tuple[Any, int]:
+    """Locate the IoStatus block within the IRP structure.
 
-            with mdl_struct.ref(ql.mem, mdl_addr) as mdl_obj:
-                mapped_address = __heap_alloc(len(in_buffer))
+    Args:
+        archbits: required bitness
 
-                mdl_obj.MappedSystemVa = mapped_address
-                mdl_obj.StartVa = mapped_address
-                mdl_obj.ByteOffset = 0
-                mdl_obj.ByteCount = len(in_buffer)
+    Returns: a 2-tuple of the IoStatus block structure class and its offset within the IRP
+    """
+
+    irp_struct = make_irp(archbits)
+    iostatus_struct = next(ftype for fname, ftype, *_ in irp_struct._fields_ if fname == 'IoStatus')
 
-            irp_obj.MdlAddress = mdl_addr
+    return iostatus_struct, irp_struct.offsetof('IoStatus')
 
-        # NEITHER_IO
-        else:
-            input_buffer_addr = __heap_alloc(len(in_buffer))
 
-            ql.mem.write(input_buffer_addr, bytes(in_buffer))
-            irp_obj.UserBuffer = input_buffer_addr
+def _read_io_status(ql: Qiling, irp_addr: int) -> Tuple[int, int]:
+    """Read the IoStatus block of an IRP, without having to read the entire IRP.
+
+    Args:
+        irp_addr: IRP address
+
+    Returns: a 2-tuple of the IRP status and information values
+    """
+
+    iostatus_struct, iostatus_offset = _io_status_layout(ql.arch.bits)
+
+    iostatus_obj = iostatus_struct.load_from(ql.mem, irp_addr + iostatus_offset)
+
+    return iostatus_obj.Status.Status, iostatus_obj.Information
+
+
+def io_Write(ql: Qiling, in_buffer: bytes) -> int:
+    major_func = ql.loader.driver_object.MajorFunction[IRP_MJ_WRITE]
+
+    if not major_func:
+        raise QlErrorSyscallError('null MajorFunction field')
+
+    irp_struct = make_irp(ql.arch.bits)
+    irpstack_struct = make_io_stack_location(ql.arch.bits)
+    mdl_struct = make_mdl(ql.arch.bits)
+
+    # load DeviceObject from memory
+    devobj_struct = make_device_object(ql.arch.bits)
+    devobj_obj = devobj_struct.load_from(ql.mem, ql.loader.driver_object.DeviceObject)
+
+    buffered_io = bool(devobj_obj.Flags & DO_BUFFERED_IO)
+    direct_io = bool(devobj_obj.Flags & DO_DIRECT_IO) and not buffered_io
+
+    # lay out all structures and buffers on a single heap allocation
+    base, size, (irp_addr, irpstack_addr, mdl_addr, buffer_addr) = _heap_alloc_many(ql, (
+        irp_struct.sizeof(),
+        irpstack_struct.sizeof(),
+        mdl_struct.sizeof() if direct_io else 0,
+        len(in_buffer)
+    ))
+
+    ql.log.info(f'IRP is at {irp_addr:#x}')
+    ql.log.info(f'IO_STACK_LOCATION is at {irpstack_addr:#x}')
+
+    irpstack_obj = irpstack_struct()
+    irpstack_obj.MajorFunction = IRP_MJ_WRITE
+    irpstack_obj.Parameters.Write.Length = len(in_buffer)
+
+    irp_obj = irp_struct()
+    irp_obj.irpstack = irpstack_addr
+
+    placements = [
+        (buffer_addr, in_buffer)
+    ]
+
+    # BUFFERED_IO
+    if buffered_io:
+        irp_obj.AssociatedIrp.SystemBuffer = buffer_addr
+
+    # DIRECT_IO
+    elif direct_io:
+        mdl_obj = _build_mdl(ql, buffer_addr, len(in_buffer))
+
+        placements.append((mdl_addr, mdl_obj))
+        irp_obj.MdlAddress = mdl_addr
+
+    # NEITHER_IO
+    else:
+        irp_obj.UserBuffer = buffer_addr
+
+    placements.append((irpstack_addr, irpstack_obj))
+    placements.append((irp_addr, irp_obj))
+
+    _write_scratch(ql, base, size, placements)
 
     # set function args
     # TODO: make sure this is indeed STDCALL
@@ -117,11 +209,10 @@ def io_Write(ql: Qiling, in_buffer: bytes) -> int:
         verify_ret(ql, err)
 
     # read updated IRP state before releasing resources
-    with irp_struct.ref(ql.mem, irp_addr) as irp_obj:
-        info = irp_obj.IoStatus.Information
+    _, info = _read_io_status(ql, irp_addr)
 
     # free all allocated memory
-    __free_all(allocations)
+    ql.os.heap.free(base)
 
     return info
 
@@ -142,85 +233,71 @@ def ioctl(ql: Qiling, params: Tuple[Tuple, int, bytes]) -> Tuple[int, int, bytes
     if not major_func:
         raise QlErrorSyscallError('null MajorFunction field')
 
-    # keep track of all heap allocation within this scope to be able
-    # to free them when done
-    allocations = []
-
-    def __heap_alloc(size: int) -> int:
-        address = ql.os.heap.alloc(size)
-        allocations.append(address)
-
-        return address
-
-    def __free_all(allocations: Iterable[int]) -> None:
-        for address in allocations:
-            ql.os.heap.free(address)
-
     def ioctl_code(DeviceType: int, Function: int, Method: int, Access: int) -> int:
         return (DeviceType << 16) | (Access << 14) | (Function << 2) | Method
 
-    # create new memory region to store input data
     _ioctl_code, output_buffer_size, in_buffer = params
 
     # extract data transfer method
     devicetype, function, ctl_method, access = _ioctl_code
 
-    input_buffer_size = len(in_buffer)
-    input_buffer_addr = __heap_alloc(input_buffer_size)
-    ql.mem.write(input_buffer_addr, bytes(in_buffer))
+    direct_io = ctl_method in (METHOD_IN_DIRECT, METHOD_OUT_DIRECT)
 
-    # create new memory region to store out data
-    output_buffer_addr = __heap_alloc(output_buffer_size)
+    input_buffer_size = len(in_buffer)
 
-    # allocate memory for AssociatedIrp.SystemBuffer
-    # used by IOCTL_METHOD_IN_DIRECT, IOCTL_METHOD_OUT_DIRECT and IOCTL_METHOD_BUFFERED
+    # AssociatedIrp.SystemBuffer is used by IOCTL_METHOD_IN_DIRECT, IOCTL_METHOD_OUT_DIRECT and IOCTL_METHOD_BUFFERED
     system_buffer_size = max(input_buffer_size, output_buffer_size)
-    system_buffer_addr = __heap_alloc(system_buffer_size)
-    ql.mem.write(system_buffer_addr, bytes(in_buffer))
 
-    # allocate memory for IRP
     irp_struct = make_irp(ql.arch.bits)
-    irp_addr = __heap_alloc(irp_struct.sizeof())
-    ql.log.info(f'IRP is at {irp_addr:#x}')
+    irpstack_struct = make_io_stack_location(ql.arch.bits)
+    mdl_struct = make_mdl(ql.arch.bits)
+
+    # lay out all structures and buffers on a single heap allocation
+    base, size, (irp_addr, irpstack_addr, mdl_addr, input_buffer_addr, output_buffer_addr, system_buffer_addr, mapped_addr) = _heap_alloc_many(ql, (
+        irp_struct.sizeof(),
+        irpstack_struct.sizeof(),
+        mdl_struct.sizeof() if direct_io else 0,
+        input_buffer_size,
+        output_buffer_size,
+        system_buffer_size,
+        output_buffer_size if direct_io else 0
+    ))
 
-    # populate the structure
-    with irp_struct.ref(ql.mem, irp_addr) as irp_obj:
+    ql.log.info(f'IRP is at {irp_addr:#x}')
+    ql.log.info(f'IO_STACK_LOCATION is at {irpstack_addr:#x}')
 
-        # allocate memory for IO_STACK_LOCATION
-        irpstack_struct = make_io_stack_location(ql.arch.bits)
-        irpstack_addr = __heap_alloc(irpstack_struct.sizeof())
-        ql.log.info(f'IO_STACK_LOCATION is at {irpstack_addr:#x}')
+    irpstack_obj = irpstack_struct()
+    irpstack_obj.Parameters.DeviceIoControl.IoControlCode = ioctl_code(devicetype, function, ctl_method, access)
+    irpstack_obj.Parameters.DeviceIoControl.OutputBufferLength = output_buffer_size
+    irpstack_obj.Parameters.DeviceIoControl.InputBufferLength = input_buffer_size
+    irpstack_obj.Parameters.DeviceIoControl.Type3InputBuffer = input_buffer_addr # used by IOCTL_METHOD_NEITHER
 
-        # populate the structure
-        with irpstack_struct.ref(ql.mem, irpstack_addr) as irpstack_obj:
-            irpstack_obj.Parameters.DeviceIoControl.IoControlCode = ioctl_code(devicetype, function, ctl_method, access)
-            irpstack_obj.Parameters.DeviceIoControl.OutputBufferLength = output_buffer_size
-            irpstack_obj.Parameters.DeviceIoControl.InputBufferLength = input_buffer_size
-            irpstack_obj.Parameters.DeviceIoControl.Type3InputBuffer = input_buffer_addr # used by IOCTL_METHOD_NEITHER
+    irp_obj = irp_struct()
+    irp_obj.irpstack = irpstack_addr
+    irp_obj.AssociatedIrp.SystemBuffer = system_buffer_addr
 
-        irp_obj.irpstack = irpstack_addr
+    placements = [
+        (input_buffer_addr, in_buffer),
+        (system_buffer_addr, in_buffer)
+    ]
 
-        if ctl_method in (METHOD_IN_DIRECT, METHOD_OUT_DIRECT):
-            mdl_struct = make_mdl(ql.arch.bits)
-            mdl_addr = __heap_alloc(mdl_struct.sizeof())
+    if direct_io:
+        # Create MDL structure for output data
+        mdl_obj = _build_mdl(ql, mapped_addr, output_buffer_size)
 
-            # Create MDL structure for output data
-            with mdl_struct.ref(ql.mem, mdl_addr) as mdl_obj:
-                mapped_address = __heap_alloc(output_buffer_size)
+        placements.append((mdl_addr, mdl_obj))
 
-                mdl_obj.MappedSystemVa = mapped_address
-                mdl_obj.StartVa = mapped_address
-                mdl_obj.ByteOffset = 0
-                mdl_obj.ByteCount = output_buffer_size
+        # used by both IOCTL_METHOD_IN_DIRECT and IOCTL_METHOD_OUT_DIRECT
+        irp_obj.MdlAddress = mdl_addr
 
-            # used by both IOCTL_METHOD_IN_DIRECT and IOCTL_METHOD_OUT_DIRECT
-            irp_obj.MdlAddress = mdl_addr
+    elif ctl_method == METHOD_NEITHER:
+        # used by IOCTL_METHOD_NEITHER
+        irp_obj.UserBuffer = output_buffer_addr
 
-        elif ctl_method == METHOD_NEITHER:
-            # used by IOCTL_METHOD_NEITHER
-            irp_obj.UserBuffer = output_buffer_addr
+    placements.append((irpstack_addr, irpstack_obj))
+    placements.append((irp_addr, irp_obj))
 
-        irp_obj.AssociatedIrp.SystemBuffer = system_buffer_addr
+    _write_scratch(ql, base, size, placements)
 
     # set function args
     # TODO: make sure this is indeed STDCALL
@@ -239,12 +316,7 @@ def ioctl(ql: Qiling, params: Tuple[Tuple, int, bytes]) -> Tuple[int, int, bytes
         verify_ret(ql, err)
 
     # read updated IRP state before releasing resources
-    with irp_struct.ref(ql.mem, irp_addr) as irp_obj:
-        io_status = irp_obj.IoStatus
-        mdl_addr = irp_obj.MdlAddress
-
-        info = io_status.Information
-        status = io_status.Status.Status
+    status, info = _read_io_status(ql, irp_addr)
 
     # read output data
     output_data = b''
@@ -253,17 +325,16 @@ def ioctl(ql: Qiling, params: Tuple[Tuple, int, bytes]) -> Tuple[int, int, bytes
         if ctl_method == METHOD_BUFFERED:
             output_data = ql.mem.read(system_buffer_addr, info)
 
-        elif ctl_method in (METHOD_IN_DIRECT, METHOD_OUT_DIRECT):
-            with mdl_struct.ref(ql.mem, mdl_addr) as mdl_obj:
-                mapped_va = mdl_obj.MappedSystemVa
+        elif direct_io:
+            mdl_obj = mdl_struct.load_from(ql.mem, mdl_addr)
 
-            output_data = ql.mem.read(mapped_va, info)
+            output_data = ql.mem.read(mdl_obj.MappedSystemVa, info)
 
         elif ctl_method == METHOD_NEITHER:
             output_data = ql.mem.read(output_buffer_addr, info)
 
     # now free all alloc memory
-    __free_all(allocations)
+    ql.os.heap.free(base)
 
     return status, info, output_data
 
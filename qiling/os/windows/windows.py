@@ -48,15 +48,18 @@ class QlOsWindows(QlOs):
             a MS64 fcall instance.
             """
 
+            # fcall instances are created once and then shared by all callers
             __fcall_objs = {
                 fncc.STDCALL: QlFunctionCall(ql, intel.stdcall(ql.arch)),
                 fncc.CDECL  : QlFunctionCall(ql, intel.cdecl(ql.arch)),
                 fncc.MS64   : QlFunctionCall(ql, intel.ms64(ql.arch))
             }
 
+            __ms64 = __fcall_objs[fncc.MS64]
+
             __selector = {
-                QL_ARCH.X86  : lambda cc: __fcall_objs[cc],
-                QL_ARCH.X8664: lambda cc: __fcall_objs[fncc.MS64]
+                QL_ARCH.X86  : __fcall_objs.__getitem__,
+                QL_ARCH.X8664: lambda cc: __ms64
             }
 
             return __selector[atype]
@@ -440,6 +440,69 @@ class MCUTest(unittest.TestCase):
         self.assertEqual(ql.hw.usart2.recv(), b'Nice Hack!\n')
         self.assertEqual(ql.hw.usart3.recv(), b'Welcome to the world of Hacking!\naaaaaaaaaaaaaaaaaaaa\xa9\x05\n')
 
+    def test_mcu_step_interval_stm32f411(self):
+        def create_qiling():
+            ql = Qiling(["../examples/rootfs/mcu/stm32f411/hello_usart.hex"],
+                        archtype=QL_ARCH.CORTEX_M, ostype=QL_OS.MCU, env=stm32f411, verbose=QL_VERBOSE.DEFAULT)
+
+            ql.hw.create('usart2')
+            ql.hw.create('rcc')
+
+            return ql
+
+        ql1 = create_qiling()
+        ql1.os.step_interval = 16
+        ql1.run(count=2000)
+
+        self.assertEqual(ql1.os.counter, 2000)
+        self.assertEqual(ql1.hw.usart2.recv(), b'Hello USART\n')
+
+        # find an address along the execution path to serve as an exit point
+        ql2 = create_qiling()
+        ql2.run(count=1000)
+        exit_point = ql2.arch.regs.arch_pc
+
+        # batched emulation should stop at the exit point, even though it lacks the thumb bit
+        ql3 = create_qiling()
+        ql3.os.step_interval = 16
+        ql3.run(end=exit_point & ~0b1)
+
+        self.assertEqual(ql3.arch.regs.arch_pc, exit_point)
+        self.assertLessEqual(ql3.os.counter, 1000)
+
+        del ql1, ql2, ql3
+
+    def test_mcu_step_interval_interrupt_stm32f411(self):
+        def run_timer(interval):
+            ql = Qiling(['../examples/rootfs/mcu/stm32f411/basic-timer.elf'],
+                        archtype=QL_ARCH.CORTEX_M, ostype=QL_OS.MCU, env=stm32f411, verbose=QL_VERBOSE.DEFAULT)
+
+            ql.hw.create('rcc')
+            ql.hw.create('flash interface')
+            ql.hw.create('pwr')
+            ql.hw.create('gpioa')
+            ql.hw.create('usart2')
+            ql.hw.create('tim1')
+
+            ql.hw.tim1.set_ratio(1500)
+
+            # the timer raises interrupts while peripherals are stepped; instructions of the
+            # interrupt handlers must not be counted twice
+            ql.os.step_interval = interval
+            ql.run(count=2500)
+
+            counter = ql.os.counter
+
+            del ql
+
+            return counter
+
+        counter1 = run_timer(1)
+        counter16 = run_timer(16)
+
+        self.assertEqual(counter1, 2500)
+        self.assertEqual(counter16, counter1)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+#
+# Cross Platform and Multi Architecture Advanced Binary Emulation Framework
+#
+
+import sys, unittest
+from typing import Sequence
+
+sys.path.append("..")
+
+from qiling import Qiling
+from qiling.const import QL_ARCH, QL_OS, QL_VERBOSE
+
+# we only need context and not going to run anything anyway, so just use whatever
+NOPSLED = b'\x90' * 8
+ROOTFS = r'../examples/rootfs/x8664_linux'
+
+
+class PrintfTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        ql = Qiling(code=NOPSLED, rootfs=ROOTFS, archtype=QL_ARCH.X8664, ostype=QL_OS.LINUX, verbose=QL_VERBOSE.DISABLED)
+
+        self.ptr = 0x100000
+        self.buf = self.ptr + 0x800
+        self.ql = ql
+
+        ql.mem.map(self.ptr, 0x1000)
+        ql.mem.write(self.ptr, b'world\x00')
+
+    def sprintf(self, format: str, args: Sequence[int]) -> str:
+        count, _ = self.ql.os.utils.sprintf(self.buf, format, iter(args))
+
+        return self.ql.mem.read(self.buf, count).decode()
+
+    def test_plain(self):
+        self.assertEqual(self.sprintf('no specifiers', []), 'no specifiers')
+        self.assertEqual(self.sprintf('100%% done', []), '100% done')
+        self.assertEqual(self.sprintf('trailing %', []), 'trailing %')
+
+    def test_flags(self):
+        self.assertEqual(self.sprintf('[%-5d]', [42]), '[42   ]')
+        self.assertEqual(self.sprintf('[%5d]', [42]), '[   42]')
+        self.assertEqual(self.sprintf('[%05x]', [0xab]), '[000ab]')
+        self.assertEqual(self.sprintf('[%+d]', [7]), '[+7]')
+
+    def test_star(self):
+        self.assertEqual(self.sprintf('[%*d]', [6, 42]), '[    42]')
+        self.assertEqual(self.sprintf('[%.*s]', [3, self.ptr]), '[wor]')
+        self.assertEqual(self.sprintf('[%*.*s]', [5, 2, self.ptr]), '[   wo]')
+
+    def test_sizes(self):
+        self.assertEqual(self.sprintf('%I64d', [5]), '5')
+        self.assertEqual(self.sprintf('%I64x', [0x1122334455667788]), '1122334455667788')
+        self.assertEqual(self.sprintf('%llx', [0xdeadbeef]), 'deadbeef')
+        self.assertEqual(self.sprintf('%lld %hd', [12, 34]), '12 34')
+
+    def test_types(self):
+        self.assertEqual(self.sprintf('%p', [0x1000]), '0x1000')
+        self.assertEqual(self.sprintf('hello %s!', [self.ptr]), 'hello world!')
+        self.assertEqual(self.sprintf('%c%c', [0x68, 0x69]), 'hi')
+
+    def test_consumed_args(self):
+        _, upd_args = self.ql.os.utils.sprintf(self.buf, '%% %*d %s', iter([4, 2, self.ptr, 0xdead]))
+
+        params = {}
+        upd_args(params)
+
+        self.assertEqual(list(params.values()), [4, 2, self.ptr])
+
+
+if __name__ == "__main__":
+    unittest.main()
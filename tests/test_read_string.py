@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+#
+# Cross Platform and Multi Architecture Advanced Binary Emulation Framework
+#
+
+import sys, unittest
+
+sys.path.append("..")
+
+from qiling import Qiling
+from qiling.const import QL_ARCH, QL_OS, QL_VERBOSE
+from qiling.os.utils import QlOsUtils
+
+# we only need context and not going to run anything anyway, so just use whatever
+NOPSLED = b'\x90' * 8
+ROOTFS = r'../examples/rootfs/x8664_linux'
+
+BLOCK = QlOsUtils.READ_BLOCK_SIZE
+
+
+class ReadStringTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        ql = Qiling(code=NOPSLED, rootfs=ROOTFS, archtype=QL_ARCH.X8664, ostype=QL_OS.LINUX, verbose=QL_VERBOSE.DISABLED)
+
+        self.base = 0x100000
+        self.ql = ql
+
+        ql.mem.map(self.base, 0x2000)
+
+        # fill memory with non-null garbage, so strings are delimited only by their terminators
+        ql.mem.write(self.base, b'\xcc' * 0x2000)
+
+    def test_cstring(self):
+        ptr = self.base + 0x10
+        self.ql.mem.write(ptr, b'hello world\x00')
+
+        self.assertEqual(self.ql.os.utils.read_cstring(ptr), 'hello world')
+
+    def test_cstring_crossing_block(self):
+        s = 'a' * 40 + 'b' * 40
+        ptr = self.base + BLOCK - 40
+
+        self.ql.mem.write(ptr, s.encode() + b'\x00')
+
+        self.assertEqual(self.ql.os.utils.read_cstring(ptr), s)
+
+    def test_cstring_terminator_at_block_end(self):
+        s = 'x' * 15
+        ptr = self.base + BLOCK - 16
+
+        # terminator occupies the very last byte of the block
+        self.ql.mem.write(ptr, s.encode() + b'\x00')
+
+        self.assertEqual(self.ql.os.utils.read_cstring(ptr), s)
+
+    def test_wstring_odd_address_crossing_block(self):
+        # encoding 'a' followed by U+0100 yields two consecutive null bytes at an odd offset,
+        # which should not be mistaken for a terminator
+        s = 'wide a\u0100 string' * 4
+        ptr = self.base + BLOCK - 21
+
+        self.ql.mem.write(ptr, s.encode('utf-16le') + b'\x00\x00')
+
+        self.assertEqual(self.ql.os.utils.read_wstring(ptr), s)
+
+    def test_wstring_terminator_straddling_block(self):
+        s = 'y' * 10
+        ptr = self.base + BLOCK - 21
+
+        # terminator begins at the last byte of the block and ends on the next one
+        self.ql.mem.write(ptr, s.encode('utf-16le') + b'\x00\x00')
+
+        self.assertEqual(self.ql.os.utils.read_wstring(ptr), s)
+
+    def test_maxlen(self):
+        s = 'z' * 300
+        ptr = self.base + BLOCK - 8
+
+        self.ql.mem.write(ptr, s.encode() + b'\x00')
+        self.ql.mem.write(ptr + 0x400, s.encode('utf-16le') + b'\x00\x00')
+
+        # shorter than the string
+        self.assertEqual(self.ql.os.utils.read_cstring(ptr, 5), s[:5])
+        self.assertEqual(self.ql.os.utils.read_cstring(ptr, 260), s[:260])
+        self.assertEqual(self.ql.os.utils.read_wstring(ptr + 0x400, 130), s[:130])
+
+        # longer than the string
+        self.assertEqual(self.ql.os.utils.read_cstring(ptr, 400), s)
+        self.assertEqual(self.ql.os.utils.read_wstring(ptr + 0x400, 400), s)
+
+        # exactly the string length
+        self.assertEqual(self.ql.os.utils.read_cstring(ptr, 300), s)
+
+
+if __name__ == '__main__':
+    unittest.main()